@@ -29,8 +29,11 @@
 
 """cfg.py: Base classes for representing Control Flow Graphs (CFGs)"""
 
-import abc
+import bisect
+import io
+import operator
 import typing as t
+from collections import deque
 
 import src.patterns as patterns
 
@@ -40,21 +43,64 @@ class ControlFlowGraph(patterns.Visitable):
 
     __STR_SEP = "\n\n-----\n\n"
 
-    @abc.abstractmethod
+    __ENTRY_KEY = operator.attrgetter("entry")
+
     def __init__(self):
         """Create a new empty ControlFlowGraph"""
 
+        # Don't allow instantiation of ControlFlowGraph itself
+        if type(self) is ControlFlowGraph:
+            raise NotImplementedError("ControlFlowGraph must be sub-classed")
+
         self.blocks = []
-        """List of BasicBlock objects"""
 
         self.root = None
         """The root BasicBlock object, or None for the empty graph"""
 
+    @property
+    def blocks(self) -> t.Tuple['BasicBlock', ...]:
+        """
+        Tuple of BasicBlock objects, in the order they were added.
+
+        The tuple is a read-only view: blocks are added and removed through
+        add_block(), remove_block() and remove_blocks(), or replaced
+        wholesale by assigning a new sequence to this property, so that the
+        graph's block indexes remain valid. Block entry and exit addresses
+        should also be left unchanged while they belong to the graph.
+        """
+        if self._blocks_view is None:
+            self._blocks_view = tuple(self._blocks)
+        return self._blocks_view
+
+    @blocks.setter
+    def blocks(self, blocks: t.Iterable['BasicBlock']) -> None:
+        self._blocks = list(blocks)
+        self._block_set = set(self._blocks)
+        self._by_entry = None
+        self._reach_cache = {}
+        self._blocks_changed()
+
     def __len__(self):
         return len(self.blocks)
 
     def __str__(self):
-        return self.__STR_SEP.join(str(b) for b in self.blocks)
+        buf = io.StringIO()
+        self.write_to(buf)
+        return buf.getvalue()
+
+    def write_to(self, fp: t.TextIO) -> None:
+        """
+        Write the textual representation of this graph to the given file
+        object, one block at a time.
+
+        Args:
+          fp: a writable text file object.
+        """
+        sep = ""
+        for b in self.blocks:
+            fp.write(sep)
+            b.write_to(fp)
+            sep = self.__STR_SEP
 
     def remove_block(self, block: 'BasicBlock') -> None:
         """
@@ -68,14 +114,53 @@ class ControlFlowGraph(patterns.Visitable):
         for s in list(block.succs):
             self.remove_edge(block, s)
 
-        self.blocks.remove(block)
+        self._blocks.remove(block)
+        self._block_set.discard(block)
+        self._blocks_changed()
+        if self._by_entry is not None:
+            entry_blocks = self._by_entry[block.entry]
+            entry_blocks.remove(block)
+            if len(entry_blocks) == 0:
+                del self._by_entry[block.entry]
+
+    def remove_blocks(self, blocks: t.Iterable['BasicBlock']) -> None:
+        """
+        Remove all of the given blocks from the graph, disconnecting all of
+        their incident edges. This is equivalent to calling remove_block() on
+        each of them, but only passes over the graph's block list once.
+        """
+        doomed = set(blocks)
+        if self.root in doomed:
+            self.root = None
+
+        # Detach the remaining neighbours of the removed blocks, keeping the
+        # order of their edge lists, then disconnect the removed blocks.
+        neighbours = set()
+        for block in doomed:
+            neighbours.update(block.preds)
+            neighbours.update(block.succs)
+        for block in neighbours - doomed:
+            block.preds[:] = [p for p in block.preds if p not in doomed]
+            block.succs[:] = [s for s in block.succs if s not in doomed]
+        for block in doomed:
+            block.preds.clear()
+            block.succs.clear()
+
+        self._blocks = [b for b in self._blocks if b not in doomed]
+        self._block_set -= doomed
+        self._by_entry = None
+        self._blocks_changed()
 
     def add_block(self, block: 'BasicBlock') -> None:
         """
         Add the given block to the graph, assuming it does not already exist.
         """
-        if block not in self.blocks:
-            self.blocks.append(block)
+        if block not in self._block_set:
+            self._blocks.append(block)
+            self._block_set.add(block)
+            self._blocks_changed()
+            if self._by_entry is not None:
+                self._by_entry.setdefault(block.entry, []).append(block)
 
     def has_edge(self, head: 'BasicBlock', tail: 'BasicBlock') -> bool:
         """
@@ -87,23 +172,105 @@ class ControlFlowGraph(patterns.Visitable):
         """Remove the CFG edge that goes from head to tail."""
         if tail in head.succs:
             head.succs.remove(tail)
+            self._edges_changed()
         if head in tail.preds:
             tail.preds.remove(head)
+            self._edges_changed()
 
     def add_edge(self, head: 'BasicBlock', tail: 'BasicBlock'):
         """Add a CFG edge that goes from head to tail."""
         if tail not in head.succs:
             head.succs.append(tail)
+            self._edges_changed()
         if head not in tail.preds:
             tail.preds.append(head)
+            self._edges_changed()
+
+    def _blocks_changed(self) -> None:
+        """
+        Discard cached information derived from the graph's block list.
+        This must be called whenever blocks are added or removed.
+        """
+        self._blocks_view = None
+        self._pc_index = None
+        self._sorted_cache = {}
+        self._edges_changed()
+
+    def _edges_changed(self) -> None:
+        """
+        Discard cached information derived from the graph's edges. This must
+        be called whenever blocks or edges are added or removed.
+        """
+        self._reach_cache.clear()
+        self._adjacency = None
+
+    def adjacency(self) -> t.Tuple[t.Dict['BasicBlock', int],
+                                   t.List[t.Tuple[int, ...]],
+                                   t.List[t.Tuple[int, ...]]]:
+        """
+        Return a numbering of the graph's blocks by their position in the
+        block list, along with each block's predecessors and successors as
+        tuples of block numbers, in their original order.
+
+        This lets analyses which only read the graph follow edges between
+        integers in flat lists rather than through the blocks themselves.
+        The result is cached until blocks or edges change, and must not be
+        modified.
+
+        Returns:
+          a tuple `(index, preds, succs)`, where index maps each block to its
+          number, and preds and succs are lists indexed by block number.
+        """
+        if self._adjacency is None:
+            index = {block: i for i, block in enumerate(self.blocks)}
+            preds = [tuple(index[p] for p in block.preds) for block in self.blocks]
+            succs = [tuple(index[s] for s in block.succs) for block in self.blocks]
+            self._adjacency = (index, preds, succs)
+        return self._adjacency
+
+    def get_blocks_by_entry(self, entry: int) -> t.List['BasicBlock']:
+        """Return the blocks whose first program counter value is entry."""
+        if self._by_entry is None:
+            self._by_entry = {}
+            for block in self.blocks:
+                self._by_entry.setdefault(block.entry, []).append(block)
+        return list(self._by_entry.get(entry, ()))
 
     def get_blocks_by_pc(self, pc: int) -> t.List['BasicBlock']:
-        """Return the blocks whose spans include the given program counter value."""
-        blocks = []
-        for block in self.blocks:
-            if block.entry <= pc <= block.exit:
-                blocks.append(block)
-        return blocks
+        """
+        Return the blocks whose spans include the given program counter value,
+        in the order they appear in the graph's block list.
+        """
+        if self._pc_index is None:
+            self._build_pc_index()
+        entries, positions, max_exits = self._pc_index
+
+        # Only blocks entered at or before pc can contain it, and the scan can
+        # stop once no block entered at or before the current one reaches pc.
+        found = []
+        i = bisect.bisect_right(entries, pc) - 1
+        while i >= 0 and max_exits[i] >= pc:
+            block = self.blocks[positions[i]]
+            if block.exit >= pc:
+                found.append((positions[i], block))
+            i -= 1
+        found.sort(key=operator.itemgetter(0))
+        return [block for _, block in found]
+
+    def _build_pc_index(self) -> None:
+        """
+        Index the blocks by entry, so that get_blocks_by_pc() can bisect
+        instead of scanning every block.
+        """
+        positions = sorted(range(len(self.blocks)),
+                           key=lambda i: self.blocks[i].entry)
+        entries = [self.blocks[i].entry for i in positions]
+        max_exits = []
+        max_exit = -1
+        for i in positions:
+            max_exit = max(max_exit, self.blocks[i].exit)
+            max_exits.append(max_exit)
+        self._pc_index = (entries, positions, max_exits)
 
     def get_block_by_ident(self, ident: str) -> 'BasicBlock':
         """Return the block with the specified identifier, if it exists."""
@@ -116,12 +283,16 @@ class ControlFlowGraph(patterns.Visitable):
         """
         Given a cfg where block successor lists are populated,
         also repopulate the predecessor lists, after emptying them.
+        Each predecessor is recorded only once, even if it appears more than
+        once in a successor list.
         """
         for block in self.blocks:
             block.preds = []
         for block in self.blocks:
             for successor in block.succs:
-                successor.preds.append(block)
+                if block not in successor.preds:
+                    successor.preds.append(block)
+        self._edges_changed()
 
     def reaches(self, block: 'BasicBlock', dests: t.Iterable['BasicBlock']) -> bool:
         """
@@ -133,46 +304,99 @@ class ControlFlowGraph(patterns.Visitable):
         """
         if block in dests:
             return True
-        queue = [block]
-        traversed = []
+        return not self.reachable_from(block).isdisjoint(dests)
+
+    def reachable_from(self, block: 'BasicBlock') -> t.Set['BasicBlock']:
+        """
+        Return the set of blocks reachable from the given block by following
+        one or more successor edges. Results are cached until an edge is added
+        to or removed from the graph, so the returned set must not be modified.
+
+        Args:
+          block: the block from which to search.
+        """
+        reached = self._reach_cache.get(block)
+        if reached is None:
+            reached = set()
+            queue = list(block.succs)
+            while queue:
+                curr_block = queue.pop()
+                if curr_block not in reached:
+                    reached.add(curr_block)
+                    queue.extend(curr_block.succs)
+            self._reach_cache[block] = reached
+        return reached
+
+    def blocks_reaching(self, dests: t.Iterable['BasicBlock']) -> t.Set['BasicBlock']:
+        """
+        Return the set of blocks that can reach any of the given destination
+        blocks, including the destinations themselves; that is, each block
+        for which reaches(block, dests) holds.
+
+        Like reaches(), this follows successor edges, so predecessor lists
+        need not be consistent with them.
+
+        Args:
+          dests: the blocks from which to search backwards.
+        """
+        # Invert the successor lists once, then search backwards from dests.
+        sources = {}
+        for block in self.blocks:
+            for succ in block.succs:
+                sources.setdefault(succ, []).append(block)
+
+        reaching = set(dests)
+        queue = list(reaching)
         while queue:
             curr_block = queue.pop()
-            traversed.append(curr_block)
-            for b in dests:
-                if b in curr_block.succs:
-                    return True
-            for b in curr_block.succs:
-                if b not in traversed:
-                    queue.append(b)
-        return False
+            for source in sources.get(curr_block, ()):
+                if source not in reaching:
+                    reaching.add(source)
+                    queue.append(source)
+        return reaching
 
     def transitive_closure(self, origin_addresses: t.Iterable[int]) \
         -> t.Iterable['BasicBlock']:
         """
-        Return a list of blocks reachable from the input addresses.
+        Return a list of blocks reachable from the input addresses, in
+        breadth-first order. Results are cached until the graph's blocks or
+        edges change.
 
         Args:
             origin_addresses: the input addresses blocks from which are reachable
                               to be returned.
         """
+        # Closures share the reachability cache with reachable_from(), keyed
+        # by address tuple rather than by block.
+        key = tuple(origin_addresses)
+        reached = self._reach_cache.get(key)
+        if reached is not None:
+            return list(reached)
+
+        index, _, succs = self.adjacency()
 
         # Populate the work queue with the origin blocks for the transitive closure.
-        queue = []
-        for address in origin_addresses:
+        order = []
+        seen = bytearray(len(self.blocks))
+        for address in key:
             for block in self.get_blocks_by_pc(address):
-                if block not in queue:
-                    queue.append(block)
-        reached = []
+                i = index[block]
+                if not seen[i]:
+                    seen[i] = 1
+                    order.append(i)
+        queue = deque(order)
 
         # Follow all successor edges until we can find no more new blocks.
         while queue:
-            block = queue.pop()
-            reached.append(block)
-            for succ in block.succs:
-                if succ not in queue and succ not in reached:
+            for succ in succs[queue.popleft()]:
+                if not seen[succ]:
+                    seen[succ] = 1
+                    order.append(succ)
                     queue.append(succ)
 
-        return reached
+        reached = [self.blocks[i] for i in order]
+        self._reach_cache[key] = reached
+        return list(reached)
 
     def remove_unreachable_blocks(self, origin_addresses: t.Iterable[int] = [0]) \
         -> t.Iterable['BasicBlock']:
@@ -190,23 +414,36 @@ class ControlFlowGraph(patterns.Visitable):
             An iterable of the blocks which were removed.
         """
 
-        reached = self.transitive_closure(origin_addresses)
-        removed = []
-        for block in list(self.blocks):
-            if block not in reached:
-                removed.append(block)
-                self.remove_block(block)
+        reached = set(self.transitive_closure(origin_addresses))
+        removed = [block for block in self.blocks if block not in reached]
+        self.remove_blocks(removed)
         return removed
 
-    def edge_list(self) -> t.Iterable[t.Tuple['BasicBlock', 'BasicBlock']]:
+    def edges(self) -> t.Generator[t.Tuple['BasicBlock', 'BasicBlock'], None, None]:
+        """
+        Generator for the CFG's edges, which does not materialise a list.
+
+        Returns:
+          a generator of the CFG's edges, with each edge in the form
+          `(pred, succ)` where pred and succ are object references.
+        """
+        for p in self.blocks:
+            for s in p.succs:
+                yield p, s
+
+    def edge_list(self) -> t.List[t.Tuple['BasicBlock', 'BasicBlock']]:
         """
         Returns:
           a list of the CFG's edges, with each edge in the form
           `(pred, succ)` where pred and succ are object references.
         """
-        return [(p, s) for p in self.blocks for s in p.succs]
+        return list(self.edges())
 
-    def sorted_traversal(self, key=lambda b: b.entry, reverse=False) -> t.Generator['BasicBlock', None, None]:
+    def edge_count(self) -> int:
+        """Return the number of edges in the CFG, without listing them."""
+        return sum(len(b.succs) for b in self.blocks)
+
+    def sorted_traversal(self, key=__ENTRY_KEY, reverse=False) -> t.Generator['BasicBlock', None, None]:
         """
         Generator for a sorted shallow copy of BasicBlocks contained in this graph.
 
@@ -221,8 +458,18 @@ class ControlFlowGraph(patterns.Visitable):
           A generator of :obj:`BasicBlock` objects, yielded in order according to
           `key` and `reverse`.
         """
-        # Create a new list of sorted blocks and yield from it
-        yield from sorted(self.blocks, key=key, reverse=reverse)
+        if key is not self.__ENTRY_KEY:
+            yield from sorted(self.blocks, key=key, reverse=reverse)
+            return
+
+        # Keep the default entry-ordered sort until the block list changes.
+        # The cached lists are replaced, never mutated, so
+        # callers may modify the graph while iterating.
+        blocks = self._sorted_cache.get(reverse)
+        if blocks is None:
+            blocks = sorted(self.blocks, key=key, reverse=reverse)
+            self._sorted_cache[reverse] = blocks
+        yield from blocks
 
     def accept(self, visitor: patterns.Visitor,
                generator: t.Generator['BasicBlock', None, None] = None):
@@ -269,8 +516,21 @@ class BasicBlock(patterns.Visitable):
 
     _STR_SEP = "---"
 
-    @abc.abstractmethod
+    __STR_FORMAT = "Block {}\n[{}:{}]\n{}\nPredecessors: [{}]\nSuccessors: [{}]{}"
+
+    __slots__ = ("entry", "exit", "preds", "succs", "has_unresolved_jump",
+                 "_ident_suffix", "_ident")
+
+    # Blocks deliberately keep object's identity-based __eq__ and __hash__.
+    # Cloned blocks share an entry address, so entry is not a unique key, and
+    # the builtin identity hash is both well distributed and cheaper than any
+    # __hash__ defined in Python.
+
     def __init__(self, entry: int = None, exit: int = None):
+        # Don't allow instantiation of BasicBlock itself
+        if type(self) is BasicBlock:
+            raise NotImplementedError("BasicBlock must be sub-classed")
+
         if entry is not None and entry < 0:
             raise ValueError("entry must be a positive integer or zero")
 
@@ -292,11 +552,21 @@ class BasicBlock(patterns.Visitable):
         self.has_unresolved_jump = False
         """True if the node contains a jump whose destination is a variable."""
 
-        self.ident_suffix = ""
+        self._ident_suffix = ""
+        self._ident = None
+
+    @property
+    def ident_suffix(self) -> str:
         """
         Extra information to be appended to this block's identifier.
         Used, for example, to differentiate duplicated blocks.
         """
+        return self._ident_suffix
+
+    @ident_suffix.setter
+    def ident_suffix(self, suffix: str) -> None:
+        self._ident_suffix = suffix
+        self._ident = None
 
     def __len__(self):
         """Returns the number of lines of code contained within this block."""
@@ -305,14 +575,26 @@ class BasicBlock(patterns.Visitable):
         return self.exit - self.entry
 
     def __str__(self):
-        entry, exit = map(lambda n: hex(n) if n is not None else 'Unknown',
-                          (self.entry, self.exit))
-        b_id = self.ident() if self.entry is not None else "Unidentified"
-        head = "Block {}\n[{}:{}]".format(b_id, entry, exit)
-        pred = "Predecessors: [{}]".format(", ".join(b.ident() for b in sorted(self.preds)))
-        succ = "Successors: [{}]".format(", ".join(b.ident() for b in sorted(self.succs)))
+        if self.entry is None:
+            entry, b_id = "Unknown", "Unidentified"
+        else:
+            entry = hex(self.entry)
+            b_id = self.ident()
+        exit = hex(self.exit) if self.exit is not None else "Unknown"
+        preds = ", ".join([b.ident() for b in sorted(self.preds)])
+        succs = ", ".join([b.ident() for b in sorted(self.succs)])
         unresolved = "\nHas unresolved jump." if self.has_unresolved_jump else ""
-        return "\n".join([head, self._STR_SEP, pred, succ]) + unresolved
+        return self.__STR_FORMAT.format(b_id, entry, exit, self._STR_SEP,
+                                        preds, succs, unresolved)
+
+    def write_to(self, fp: t.TextIO) -> None:
+        """
+        Write the textual representation of this block to the given file object.
+
+        Args:
+          fp: a writable text file object.
+        """
+        fp.write(str(self))
 
     def __lt__(self, other):
         """
@@ -321,15 +603,19 @@ class BasicBlock(patterns.Visitable):
         if self.entry is None or other.entry is None:
             return False
         return (self.entry < other.entry) or \
-               (self.entry == other.entry and self.ident_suffix < other.ident_suffix)
+               (self.entry == other.entry and self._ident_suffix < other._ident_suffix)
 
     def ident(self) -> str:
         """
         Returns this block's unique identifier, which is its entry value.
+        The identifier is computed once and cached until the suffix changes;
+        a block's entry does not change once it has been constructed.
 
         Raises:
           ValueError if the block's entry is None.
         """
-        if self.entry is None:
-            raise ValueError("Can't compute ident() for block with unknown entry")
-        return hex(self.entry) + self.ident_suffix
+        if self._ident is None:
+            if self.entry is None:
+                raise ValueError("Can't compute ident() for block with unknown entry")
+            self._ident = hex(self.entry) + self._ident_suffix
+        return self._ident
@@ -31,6 +31,7 @@
 
 import logging
 import time
+from collections import deque
 from typing import Dict, Any
 
 import src.cfg as cfg
@@ -49,13 +50,17 @@ def analyse_graph(cfg: tac_cfg.TACGraph) -> Dict[str, Any]:
 
     Args:
         cfg: the graph to analyse; will be modified in-place.
+
+    Returns:
+        A dict of information about the analysis. Its "bailout" entry is
+        always present, and is True iff the analysis loop stopped early on
+        reaching the time limit. Further entries are only included if
+        analytics are enabled.
     """
 
     logging.info("Beginning dataflow analysis loop.")
 
-    anal_results = {}
-    if settings.analytics:
-        anal_results["bailout"] = False
+    anal_results = {"bailout": False}
     bail_time = settings.bailout_seconds
     start_clock = time.process_time()
     i = 0
@@ -72,13 +77,14 @@ def analyse_graph(cfg: tac_cfg.TACGraph) -> Dict[str, Any]:
 
         # If the next analysis step will require more than the remaining time
         # or we have already exceeded our time budget, break out.
-        loop_time = time.process_time() - loop_start_clock
-        elapsed = time.process_time() - start_clock
+        now = time.process_time()
+        loop_time = now - loop_start_clock
+        elapsed = now - start_clock
         if bail_time >= 0:
             if elapsed > bail_time or 2 * loop_time > bail_time - elapsed:
                 logging.info("Bailed out after %s seconds", elapsed)
+                anal_results["bailout"] = True
                 if settings.analytics:
-                    anal_results["bailout"] = True
                     anal_results["bail_time"] = elapsed
                 break
 
@@ -108,10 +114,7 @@ def analyse_graph(cfg: tac_cfg.TACGraph) -> Dict[str, Any]:
         # Find out which blocks were duplicated how many times.
         for b in cfg.blocks:
             entry = hex(b.entry)
-            if entry not in dupe_counts:
-                dupe_counts[entry] = 0
-            else:
-                dupe_counts[entry] += 1
+            dupe_counts[entry] = dupe_counts.get(entry, -1) + 1
 
     # Perform final graph manipulations, and merging any blocks that were split.
     # As well as extract jump destinations directly from def-sites if they were
@@ -160,14 +163,19 @@ def analyse_graph(cfg: tac_cfg.TACGraph) -> Dict[str, Any]:
         # per-block scheme: (indegree, outdegree, multiplicity)
         anal_results["num_blocks"] = len(cfg)
         block_dict = {}
+        num_edges = 0
+        num_clones = 0
         for b in cfg.blocks:
-            multiplicity = dupe_counts[b.ident()] if b.ident() in dupe_counts else 0
-            block_dict[b.ident()] = (len(b.preds), len(b.succs), multiplicity)
+            ident = b.ident()
+            indegree = len(b.preds)
+            clones = dupe_counts.get(ident, 0)
+            block_dict[ident] = (indegree, len(b.succs), clones)
+            num_edges += indegree
+            num_clones += clones
         anal_results["blocks"] = block_dict
-        logging.info("Graph has %s edges.",
-                     sum([v[0] for v in block_dict.values()]))
+        logging.info("Graph has %s edges.", num_edges)
         if len(block_dict) > 0:
-            avg_clone = sum([v[2] for v in block_dict.values()]) / len(block_dict)
+            avg_clone = num_clones / len(block_dict)
             if avg_clone > 0:
                 logging.info("Procedure cloning occurred during analysis; "
                              "blocks were cloned an average of %.2f times each.",
@@ -197,12 +205,15 @@ def stack_analysis(cfg: tac_cfg.TACGraph) -> bool:
     if settings.reinit_stacks:
         for block in cfg.blocks:
             block.symbolic_overflow = False
-            block.entry_stack = VariableStack()
-            block.exit_stack = VariableStack()
+            block.entry_stack.clear()
+            block.exit_stack.clear()
 
     # Initialise a worklist with blocks that have no precedessors
-    queue = [block for block in cfg.blocks if len(block.preds) == 0]
-    visited = {block: False for block in cfg.blocks}
+    queue = deque(block for block in cfg.blocks if len(block.preds) == 0)
+    # The blocks currently in the worklist, for constant-time membership tests.
+    in_queue = set(queue)
+    # The blocks that have been processed at least once.
+    visited = set()
 
     # The number of times any stack has changed during a step of the analysis
     # since the last time the structure of the graph was modified.
@@ -213,8 +224,9 @@ def stack_analysis(cfg: tac_cfg.TACGraph) -> bool:
     stacks_clamped = False
 
     # Holds the join of all states this entry stack has ever been in.
-    cumulative_entry_stacks = {block.ident(): VariableStack()
-                               for block in cfg.blocks}
+    # Blocks without an entry here have not been joined into yet since the
+    # last reset, so their accumulated stack is empty.
+    cumulative_entry_stacks = {}
 
     # We won't mutate any jumps or generate any throws until the graph has stabilised, because variables will not yet
     # have attained their final values until that stage.
@@ -227,6 +239,15 @@ def stack_analysis(cfg: tac_cfg.TACGraph) -> bool:
     start_clock = time.process_time()
     counter = 0 
 
+    # Settings consulted on every visit; none of them change during the loop.
+    widen_variables = settings.widen_variables
+    widen_threshold = settings.widen_threshold
+    clamp_large_stacks = settings.clamp_large_stacks
+    mutate_blockwise = settings.mutate_blockwise
+    hook_up_stack_vars = settings.hook_up_stack_vars
+    hook_up_jumps = settings.hook_up_jumps
+    set_valued_ops = settings.set_valued_ops
+
     # Churn until we reach a fixed point.
     while queue:
 
@@ -237,30 +258,33 @@ def stack_analysis(cfg: tac_cfg.TACGraph) -> bool:
             if elapsed > bail_time:
                 break
 
-        curr_block = queue.pop(0)
+        curr_block = queue.popleft()
+        in_queue.discard(curr_block)
 
         # If there was no change to the entry stack, then there will be no
         # change to the exit stack; no need to do anything for this block.
         # But visit everything at least once.
-        if not curr_block.build_entry_stack() and visited[curr_block]:
+        if not curr_block.build_entry_stack() and curr_block in visited:
             continue
 
         # Perform any widening operations that need to be applied before calculating the exit stack.
-        if settings.widen_variables:
+        if widen_variables:
             # If a variable's possible value set might be practically unbounded,
             # it must be widened in order for our analysis not to take forever.
             # Additionally, the widening threshold should be set low enough that
             # computations involving those large stack variables don't take too long.
 
-            cume_stack = cumulative_entry_stacks[curr_block.ident()]
-            cumulative_entry_stacks[curr_block.ident()] = VariableStack.join(cume_stack,
-                                                                             curr_block.entry_stack)
+            cume_stack = cumulative_entry_stacks.get(curr_block)
+            if cume_stack is None:
+                cume_stack = VariableStack()
+            cumulative_entry_stacks[curr_block] = VariableStack.join(cume_stack,
+                                                                     curr_block.entry_stack)
 
             # Check for each stack variable whether it needs widening.
-            for i in range(len(cume_stack)):
-                v = cume_stack.value[i]
-
-                if len(v) > settings.widen_threshold and not v.is_unconstrained:
+            # The size of the underlying value set is compared directly, as
+            # Top is excluded by the second test anyway.
+            for i, v in enumerate(cume_stack.value):
+                if len(v.value) > widen_threshold and not v.is_unconstrained:
                     logging.debug("Widening %s in block %s\n   Accumulated values: %s",
                                   curr_block.entry_stack.value[i].identifier,
                                   curr_block.ident(),
@@ -268,7 +292,7 @@ def stack_analysis(cfg: tac_cfg.TACGraph) -> bool:
                     cume_stack.value[i] = memtypes.Variable.top()
                     curr_block.entry_stack.value[i].value = cume_stack.value[i].value
 
-        if settings.clamp_large_stacks and not stacks_clamped:
+        if clamp_large_stacks and not stacks_clamped:
             # As variables can grow in size, stacks can grow in depth.
             # If a stack is getting unmanageably deep, we may choose to freeze its
             # maximum depth at some point.
@@ -277,7 +301,7 @@ def stack_analysis(cfg: tac_cfg.TACGraph) -> bool:
             # positive cycle that will overflow the stacks. Clamp max stack size to
             # current maximum in response.
 
-            if visited[curr_block]:
+            if curr_block in visited:
                 unmod_stack_changed_count += 1
 
             # clamp all stacks at their current sizes, if they are large enough.
@@ -297,34 +321,49 @@ def stack_analysis(cfg: tac_cfg.TACGraph) -> bool:
         if curr_block.build_exit_stack():
             continue
 
-        if settings.mutate_blockwise:
+        # This block's successors in order, once sorted; they are only sorted
+        # again if hooking up jumps changes them.
+        sorted_succs = None
+
+        if mutate_blockwise:
             # Hook up edges from the changed stack after each block has been handled,
             # rather than all at once at the end. The graph evolves as we go.
 
-            if settings.hook_up_stack_vars:
-                curr_block.hook_up_stack_vars()
-                curr_block.apply_operations(settings.set_valued_ops)
+            if hook_up_stack_vars:
+                # Folding can only give a different result if an argument's
+                # value changed since this block was last folded.
+                if curr_block.hook_up_stack_vars() or curr_block not in visited:
+                    curr_block.apply_operations(set_valued_ops)
 
-            if settings.hook_up_jumps:
-                old_succs = list(sorted(curr_block.succs))
+            if hook_up_jumps:
+                old_succs = sorted(curr_block.succs)
                 modified = curr_block.hook_up_jumps()
                 graph_modified |= modified
 
-                if modified:
+                if not modified:
+                    sorted_succs = old_succs
+                else:
                     # Some successors of a modified block may need to be rechecked.
-                    queue += [s for s in old_succs if s not in queue]
-
-                    if settings.widen_variables:
-                        cumulative_entry_stacks = {block.ident(): VariableStack()
-                                                   for block in cfg.blocks}
-                    if settings.clamp_large_stacks:
+                    for s in old_succs:
+                        if s not in in_queue:
+                            queue.append(s)
+                            in_queue.add(s)
+
+                    if widen_variables:
+                        cumulative_entry_stacks.clear()
+                    if clamp_large_stacks:
                         unmod_stack_changed_count = 0
                         for succ in curr_block.succs:
-                            visited[succ] = False
+                            visited.discard(succ)
 
         # Add all the successors of this block to the queue to be processed, since its exit stack changed.
-        queue += [s for s in sorted(curr_block.succs) if s not in queue]
-        visited[curr_block] = True
+        if sorted_succs is None:
+            sorted_succs = sorted(curr_block.succs)
+        for s in sorted_succs:
+            if s not in in_queue:
+                queue.append(s)
+                in_queue.add(s)
+        visited.add(curr_block)
 
     # Reached a fixed point in the dataflow analysis, restore settings so we can mutate jumps and gen throws.
     settings.restore()
@@ -361,7 +400,7 @@ def stack_size_analysis(cfg: cfg.ControlFlowGraph):
         # if it's a TAC Block, then there's no need to go through the
         # EVM operations again.
         if isinstance(block, tac_cfg.TACBasicBlock):
-            return len(block.stack_adds) - block.stack_pops
+            return len(block.delta_stack) - block.delta_stack.empty_pops
 
         delta = 0
 
@@ -370,43 +409,95 @@ def stack_size_analysis(cfg: cfg.ControlFlowGraph):
 
         return delta
 
-    # Stack size information per block at entry and exit points.
-    entry_info = {block: lattice.IntLatticeElement.top() for block in cfg.blocks}
-    exit_info = {block: lattice.IntLatticeElement.top() for block in cfg.blocks}
-    block_deltas = {block: lattice.IntLatticeElement(block_stack_delta(block))
-                    for block in cfg.blocks}
-
-    # Add a distinguished empty-stack start block which does nothing.
-    start_block = evm_cfg.EVMBasicBlock()
-    exit_info[start_block] = lattice.IntLatticeElement(0)
+    # Follow edges as tuples of block numbers rather than hashing block
+    # objects throughout the fixed-point computation.
+    index, preds, succs = cfg.adjacency()
+    num_blocks = len(preds)
 
     # We will initialise entry stack size of all blocks with no predecessors
     # to zero in order to reason about the stack within a connected component.
-    init_blocks = ({cfg.root} if cfg.root is not None else {}) | \
-                  {block for block in cfg.blocks if len(block.preds) == 0}
+    init_blocks = [i for i, block_preds in enumerate(preds) if not block_preds]
+    if cfg.root is not None and preds[index[cfg.root]]:
+        init_blocks.append(index[cfg.root])
 
-    for block in init_blocks:
-        block.preds.append(start_block)
-
-    # Find the fixed point that is the meet-over-paths solution
-    queue = list(cfg.blocks)
+    # Stack size information per block at entry and exit points.
+    # Sizes are plain ints while the fixed point is found, with the lattice's
+    # own Top and Bottom values standing in for those elements, and are only
+    # wrapped in lattice elements once the analysis is complete.
+    top = lattice.IntLatticeElement._top_val()
+    bottom = lattice.IntLatticeElement._bottom_val()
+    entry_info = [top] * num_blocks
+    exit_info = [top] * num_blocks
+    block_deltas = [block_stack_delta(block) for block in cfg.blocks]
+
+    # The value each block's entry meet starts from. The initial blocks
+    # start from zero, as though entered from an empty stack.
+    entry_base = [top] * num_blocks
+    for i in init_blocks:
+        entry_base[i] = 0
+
+    # Visit blocks in reverse postorder from the initial blocks, so that most
+    # blocks are only processed once their predecessors have been.
+    # Blocks the initial blocks cannot reach come last.
+    visited = bytearray(num_blocks)
+    postorder = []
+    for root in sorted(init_blocks):
+        if visited[root]:
+            continue
+        visited[root] = 1
+        stack = [(root, iter(succs[root]))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if not visited[child]:
+                    visited[child] = 1
+                    stack.append((child, iter(succs[child])))
+                    break
+            else:
+                stack.pop()
+                postorder.append(node)
+    postorder.reverse()
+    postorder += [i for i in range(num_blocks) if not visited[i]]
+
+    # Find the fixed point that is the meet-over-paths solution.
+    # Each block is held in the work queue at most once at a time.
+    queue = deque(postorder)
+    queued = bytearray(num_blocks)
+    for i in postorder:
+        queued[i] = 1
 
     while queue:
-        current = queue.pop()
-
-        # Calculate the new entry value for the current block.
-        new_entry = lattice.IntLatticeElement.meet_all([exit_info[p]
-                                                        for p in current.preds])
+        current = queue.popleft()
+        queued[current] = 0
+
+        # Calculate the new entry value for the current block: the meet of
+        # its predecessors' exit values.
+        new_entry = entry_base[current]
+        for p in preds[current]:
+            size = exit_info[p]
+            if size == top or size == new_entry:
+                continue
+            if new_entry == top:
+                new_entry = size
+            else:
+                new_entry = bottom
+                break
 
         # If the entry value changed, we have to recompute
         # its exit value, and the entry value for its successors, eventually.
         if new_entry != entry_info[current]:
             entry_info[current] = new_entry
-            exit_info[current] = new_entry + block_deltas[current]
-            queue += sorted(current.succs)
-
-    # Remove the start block that was added.
-    for block in init_blocks:
-        block.preds.pop()
-
-    return entry_info, exit_info
+            if new_entry == top or new_entry == bottom:
+                exit_info[current] = bottom
+            else:
+                exit_info[current] = new_entry + block_deltas[current]
+            for succ in succs[current]:
+                if not queued[succ]:
+                    queued[succ] = 1
+                    queue.append(succ)
+
+    # Block numbers follow the order of cfg.blocks, so the results can be
+    # paired up with the blocks directly.
+    wrap = lattice.IntLatticeElement
+    return (dict(zip(cfg.blocks, map(wrap, entry_info))),
+            dict(zip(cfg.blocks, map(wrap, exit_info))))
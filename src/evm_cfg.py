@@ -41,6 +41,8 @@ class EVMBasicBlock(cfg.BasicBlock):
     its parent and child nodes in the graph structure.
     """
 
+    __slots__ = ("evm_ops", "fallthrough")
+
     def __init__(self, entry: int = None, exit: int = None,
                  evm_ops: t.List['EVMOp'] = None):
         """
@@ -80,15 +82,16 @@ class EVMBasicBlock(cfg.BasicBlock):
           entry: unique index of EVMOp from which the block should be split. The
             EVMOp at this index will become the first EVMOp of the new BasicBlock.
         """
-        # Create the new block.
-        new = type(self)(entry, self.exit, self.evm_ops[entry - self.entry:])
+        # Create the new block; only the ops moving into it are copied.
+        split_index = entry - self.entry
+        new = type(self)(entry, self.exit, self.evm_ops[split_index:])
 
-        # Update the current node.
+        # Update the current node, truncating its op list in place.
         self.exit = entry - 1
-        self.evm_ops = self.evm_ops[:entry - self.entry]
+        del self.evm_ops[split_index:]
 
-        # Update the block pointer in each line object
-        self.__update_evmop_refs()
+        # Update the block pointer in each line object that moved. Those
+        # remaining in this block already refer to it.
         new.__update_evmop_refs()
 
         return new
@@ -105,6 +108,8 @@ class EVMOp:
     Represents a single EVM operation.
     """
 
+    __slots__ = ("pc", "opcode", "value", "block")
+
     def __init__(self, pc: int, opcode: opcodes.OpCode, value: int = None):
         """
         Create a new EVMOp object from the given params which should correspond to
@@ -31,8 +31,10 @@
 
 import abc
 import csv
+import io
 import logging
 import os
+import typing as t
 
 import src.cfg as cfg
 import src.function as function
@@ -123,7 +125,7 @@ class CFGTsvExporter(Exporter, patterns.DynamicVisitor):
     def __generate_edges(self):
         # Write out the collection of edges between instructions (not basic blocks).
         edges = [(hex(h.pc), hex(t.pc))
-                 for h, t in self.source.op_edge_list()]
+                 for h, t in self.source.op_edges()]
         self.__generate("edge.facts", edges)
 
     def __generate_entry_exit(self):
@@ -248,7 +250,7 @@ class CFGTsvExporter(Exporter, patterns.DynamicVisitor):
             block_ranges.append((hex(block.entry), entry, exit))
 
         cfg_edges = []
-        for (u, v) in self.source.edge_list():
+        for (u, v) in self.source.edges():
             cfg_edges.append((block_id_to_global_entry[u.entry],
                 block_id_to_global_entry[v.entry]))
 
@@ -281,7 +283,7 @@ class CFGTsvExporter(Exporter, patterns.DynamicVisitor):
             self.__generate_dominators()
 
 
-class CFGStringExporter(Exporter, patterns.DynamicVisitor):
+class CFGStringExporter(Exporter):
     """
     Prints a textual representation of the given CFG to stdout.
 
@@ -295,32 +297,37 @@ class CFGStringExporter(Exporter, patterns.DynamicVisitor):
     def __init__(self, cfg: cfg.ControlFlowGraph, ordered: bool = True):
         super().__init__(cfg)
         self.ordered = ordered
-        self.blocks = []
-        self.source.accept(self)
 
-    def visit_ControlFlowGraph(self, cfg):
+    def write(self, fp: t.TextIO):
         """
-        Visit the CFG root
-        """
-        pass
+        Write a textual representation of the input CFG to the given file
+        object, without first building the whole output in memory.
 
-    def visit_BasicBlock(self, block):
-        """
-        Visit a BasicBlock in the CFG
+        Args:
+          fp: a writable text file object.
         """
-        self.blocks.append((block.entry, str(block)))
+        # Stream blocks straight from the graph rather than collecting them
+        # in a separate visitor pass first.
+        if self.ordered:
+            blocks = self.source.sorted_traversal()
+        else:
+            blocks = self.source.blocks
+        sep = ""
+        for block in blocks:
+            fp.write(sep)
+            block.write_to(fp)
+            sep = self.__BLOCK_SEP
+        if self.source.function_extractor is not None:
+            fp.write(self.__BLOCK_SEP)
+            fp.write(str(self.source.function_extractor))
 
     def export(self):
         """
-        Print a textual representation of the input CFG to stdout.
+        Return a textual representation of the input CFG.
         """
-        if self.ordered:
-            self.blocks.sort(key=lambda n: n[0])
-        blocks = self.__BLOCK_SEP.join(n[1] for n in self.blocks)
-        functions = ""
-        if self.source.function_extractor is not None:
-            functions = self.__BLOCK_SEP + str(self.source.function_extractor)
-        return blocks + functions
+        buf = io.StringIO()
+        self.write(buf)
+        return buf.getvalue()
 
 
 class CFGDotExporter(Exporter):
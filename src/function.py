@@ -32,6 +32,7 @@ Classes for identifying and exporting functions in the control flow graph.
 Tested and developed on Solidity version 0.4.11"""
 
 import typing as t
+from collections import deque
 
 import src.memtypes as memtypes
 import src.opcodes as opcodes
@@ -76,6 +77,7 @@ class FunctionExtractor:
         self.public_functions = []
         self.private_functions = []
         self.invoc_pairs = {}  # a mapping from invocation sites to return addresses
+        self._body_indices = {}  # a mapping from blocks to the functions containing them
 
     def __str__(self) -> str:
         """
@@ -107,6 +109,19 @@ class FunctionExtractor:
         self.private_functions.extend(self.extract_private_functions())
         self.public_functions.extend(self.extract_public_functions())
 
+    def index_function_bodies(self) -> None:
+        """
+        Map each block to the sorted indices in self.functions of the
+        functions whose bodies contain it, so that public function
+        extraction can look them up rather than scanning every body.
+        """
+        self._body_indices = {}
+        for i, func in enumerate(self.functions):
+            for block in func.body:
+                indices = self._body_indices.setdefault(block, [])
+                if not indices or indices[-1] != i:
+                    indices.append(i)
+
     def mark_functions(self) -> None:
         """Mark extracted function bodies with unique identifier suffixes."""
         for i, func in enumerate(self.functions):
@@ -122,24 +137,26 @@ class FunctionExtractor:
 
         # Find the function signature variable holding call data 0,
         # at the earliest query to that location in the program.
-        load_list = []
+        load_op = None
         load_block = None
 
         for block in sorted(self.cfg.blocks):
-            load_list = [op for op in block.tac_ops
-                         if op.opcode == opcodes.CALLDATALOAD
-                         and op.args[0].value.const_value == 0]
-            if len(load_list) != 0:
+            load_op = next((op for op in block.tac_ops
+                            if op.opcode == opcodes.CALLDATALOAD
+                            and op.args[0].value.const_value == 0), None)
+            if load_op is not None:
                 load_block = block
                 break
 
-        if len(load_list) == 0:
+        if load_op is None:
             return []
-        sig_var = load_list[0].lhs
+        sig_var = load_op.lhs
+        self.index_function_bodies()
 
         # Follow the signature until it's transformed into its final shape.
         for o in load_block.tac_ops:
-            if not isinstance(o, tac_cfg.TACAssignOp) or id(sig_var) not in [id(a.value) for a in o.args]:
+            if not isinstance(o, tac_cfg.TACAssignOp) or \
+               not any(a.value is sig_var for a in o.args):
                 continue
             if o.opcode == opcodes.EQ:
                 break
@@ -151,10 +168,11 @@ class FunctionExtractor:
 
         for b in self.cfg.blocks:
             for o in b.tac_ops:
-                if not isinstance(o, tac_cfg.TACAssignOp) or id(sig_var) not in [id(a.value) for a in o.args]:
+                if not isinstance(o, tac_cfg.TACAssignOp) or \
+                   not any(a.value is sig_var for a in o.args):
                     continue
                 if o.opcode == opcodes.EQ:
-                    sig = [a.value for a in o.args if id(a.value) != id(sig_var)][0]
+                    sig = next(a.value for a in o.args if a.value is not sig_var)
 
                     # Append the non-fallthrough successor to the function sig list
                     for succ in [s for s in b.succs if s != b.fallthrough]:
@@ -184,25 +202,29 @@ class FunctionExtractor:
           A Function object containing the blocks composing the function body.
         """
         body = []
-        queue = [block]
+        body_set = set()
+        queue = deque([block])
         end_block = None
         cur_block = None  # A placeholder for prev_block
         jump = False  # Keeps track of whether we have just jumped or not
         pre_jump_block = block
         while len(queue) > 0:
             prev_block = cur_block
-            cur_block = queue.pop(0)
-
-            # jump over function bodies
-            for f in self.functions:
-                if cur_block in f.body and not jump:
-                    cur_block = self.__jump_to_next_loc(cur_block, body,
-                                                        prev_block.exit_stack)
-                if cur_block in f.body and jump:
-                    # If we jumped, the previous block is actually from before the jump
-                    cur_block = self.__jump_to_next_loc(cur_block, body,
-                                                        pre_jump_block.exit_stack)
-                    jump = False
+            cur_block = queue.popleft()
+
+            # jump over function bodies, considering functions in order
+            index = 0
+            while cur_block is not None:
+                later = [i for i in self._body_indices.get(cur_block, ())
+                         if i >= index]
+                if not later:
+                    break
+                index = later[0] + 1
+                # If we jumped, the previous block is actually from before the jump
+                from_block = pre_jump_block if jump else prev_block
+                cur_block = self.__jump_to_next_loc(cur_block, body_set,
+                                                    from_block.exit_stack)
+                jump = False
             # In case we didn't find a new block to jump to
             if cur_block is None:
                 continue
@@ -210,16 +232,18 @@ class FunctionExtractor:
             if cur_block in self.invoc_pairs:
                 jump = True
                 pre_jump_block = cur_block
-                if cur_block not in body:
+                if cur_block not in body_set:
                     body.append(cur_block)
+                    body_set.add(cur_block)
                 cur_block = self.invoc_pairs[cur_block]
             # Since an invocation site always has a successor,
             # it can't be an end block for the function
 
             if len(cur_block.succs) == 0:
                 end_block = cur_block
-            if cur_block not in body:
+            if cur_block not in body_set:
                 body.append(cur_block)
+                body_set.add(cur_block)
                 for b in cur_block.succs:
                     queue.append(b)
         f = Function()
@@ -232,7 +256,7 @@ class FunctionExtractor:
         return f
 
     def __jump_to_next_loc(self, block: tac_cfg.TACBasicBlock,
-                           body: t.List[tac_cfg.TACBasicBlock],
+                           body: t.Set[tac_cfg.TACBasicBlock],
                            exit_stack: memtypes.VariableStack) -> tac_cfg.TACBasicBlock:
         """
         Helper method to jump over private functions during public function
@@ -241,30 +265,29 @@ class FunctionExtractor:
 
         Args:
           block: The current block to be tested as being in the function body
-          body: The body of the current function being identified.
+          body: The blocks in the body of the current function being identified.
           exit_stack: The stack of the previous block, or block before that after
                       a previous jump over a function. If a block is in this
                       exit_stack, then it is the next block in the flow of the
                       function currently being identified.
         """
+        # The identifiers of the blocks the exit stack may point to.
+        exit_idents = {hex(val) for var in exit_stack if var.is_finite
+                       for val in var.value}
         queue = [block]
-        visited = [block]
+        visited = {block}
         while len(queue) > 0:
             block = queue.pop()
             if len(block.succs) == 0:
                 return block
-            visited.append(block)
-            in_func = False
-            for f in self.functions:
-                if block in f.body:
-                    in_func = True
-                    break
+            visited.add(block)
+            in_func = block in self._body_indices
             # Check that the block is not related to another function,
             # and we haven't visited it yet, and that it is in the exit stack
             # We can discard blocks in the body of the function being identified
             # since we want to discover new blocks, not old ones
             if not in_func and block not in self.invoc_pairs.keys() and \
-                block.ident() in str(exit_stack) and block not in body:
+                block.ident() in exit_idents and block not in body:
                 return block
             for succ in block.succs:
                 if succ not in visited:
@@ -332,6 +355,8 @@ class FunctionExtractor:
                 for evm_op in pre.evm_ops:
                     if evm_op.opcode.is_push():
                         push_count += 1
+                        if push_count > 1:
+                            break
                 if push_count <= 1:
                     return None
                 if len(pre.delta_stack) == 0:
@@ -368,22 +393,26 @@ class FunctionExtractor:
         # Traverse down levels with BFS until we hit a block that has the return
         # addresses specified above
         body = []
-        queue = [block]
+        body_set = set()
+        return_set = set(return_blocks)
+        reaching = self.cfg.blocks_reaching(return_blocks)
+        queue = deque([block])
         end = False
         while len(queue) > 0:
-            curr_block = queue.pop(0)
+            curr_block = queue.popleft()
             # When we call a function, we just jump to the return address
             for entry in invoc_pairs:
                 if curr_block in entry:
                     body.append(curr_block)
+                    body_set.add(curr_block)
                     curr_block = entry[curr_block]
-            cur_succs = [b for b in curr_block.succs]
-            if set(return_blocks).issubset(set(cur_succs)):
+            if return_set.issubset(curr_block.succs):
                 end = True
-            if curr_block not in body and self.cfg.reaches(curr_block, return_blocks):
+            if curr_block not in body_set and curr_block in reaching:
                 body.append(curr_block)
+                body_set.add(curr_block)
                 for b in curr_block.succs:
-                    if b not in return_blocks:
+                    if b not in return_set:
                         queue.append(b)
 
         if end:
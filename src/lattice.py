@@ -284,6 +284,18 @@ class SubsetLatticeElement(BoundedLatticeElement):
             raise TypeError("Top lattice element cannot be iterated.")
         return iter(self.value)
 
+    @property
+    def is_top(self):
+        """True if this element is Top."""
+        # Equivalent to comparing against _top_val(), without building a new
+        # set on every test; this check sits in the innermost dataflow loops.
+        return len(self.value) == 1 and self.TOP_SYMBOL in self.value
+
+    @property
+    def is_bottom(self):
+        """True if this element is Bottom."""
+        return len(self.value) == 0
+
     def map(self, f: types.FunctionType) -> 'SubsetLatticeElement':
         """
         Return the result of applying a function to each of this element's values.
@@ -198,11 +198,12 @@ class Variable(ssle, Location):
         Return a Variable whose values and def sites are the
         unions of the inputs value and def site sets.
         """
-        vals = ssle.join(a, b)
         sites = ssle.join(a.def_sites, b.def_sites)
-        if vals.is_top:
+        # Take the union of the value sets directly rather than building an
+        # intermediate lattice element; it can only be Top if an input is.
+        if a.is_top or b.is_top:
             return cls.top(def_sites=sites)
-        return cls(values=vals, def_sites=sites)
+        return cls(values=a.value | b.value, def_sites=sites)
 
     @classmethod
     def top(cls, name=VAR_DEFAULT_NAME, def_sites: ssle = ssle.bottom()) -> 'Variable':
@@ -495,6 +496,16 @@ class VariableStack(LatticeElement):
                all(v1 == v2 for v1, v2 in
                    zip(reversed(self.value), reversed(other.value)))
 
+    def clear(self) -> None:
+        """
+        Empty this stack in place, resetting it to the state of a newly
+        constructed stack.
+        """
+        self.value = []
+        self.empty_pops = 0
+        self.min_max_size = self.DEFAULT_MIN_MAX_SIZE
+        self.max_size = self.DEFAULT_MAX
+
     def copy(self) -> 'VariableStack':
         """
         Produce a copy of this stack, without deep copying
@@ -33,11 +33,17 @@ import abc
 import inspect
 
 
-class Visitable(abc.ABC):
+class Visitable:
     """
     Provides an interface for an object which can accept a :obj:`Visitor`.
+
+    This is deliberately not an :obj:`abc.ABC`: it declares no abstract
+    methods, and an ABC metaclass would slow down isinstance() checks and
+    construction of every CFG block and operation.
     """
 
+    __slots__ = ()
+
     def accept(self, visitor: 'Visitor'):
         """
         Accepts a :obj:`Visitor` and calls :obj:`Visitor.visit`
@@ -100,6 +106,12 @@ class DynamicVisitor(Visitor):
         pdv.visit(5)
     """
 
+    __visit_names = {}
+    """
+    The name of the visit method resolved for each pair of visitor type and
+    target type, or None if there is no such method.
+    """
+
     def __init__(self):
         super().__init__()
 
@@ -147,17 +159,29 @@ class DynamicVisitor(Visitor):
         Returns a visit method for the given type_, or None if none could be
         found.
         """
-        # Try all the type names in the target's MRO
-        for base in inspect.getmro(type_):
-            visit_name = "visit_{}".format(base.__name__)
+        # Visit methods are looked up once per visitor and target type, rather
+        # than walking the target's MRO for every object visited.
+        key = (type(self), type_)
+        try:
+            visit_name = DynamicVisitor.__visit_names[key]
+        except KeyError:
+            visit_name = None
+
+            # Try all the type names in the target's MRO
+            for base in inspect.getmro(type_):
+                name = "visit_{}".format(base.__name__)
+
+                # If we found a matching visit_TYPE method, use it
+                if hasattr(self, name):
+                    visit_name = name
+                    break
 
-            # If we found a matching visit_TYPE method, return it
-            if hasattr(self, visit_name):
-                visit_method = getattr(self, visit_name)
-                return visit_method
+            DynamicVisitor.__visit_names[key] = visit_name
 
         # Not found => return None
-        return None
+        if visit_name is None:
+            return None
+        return getattr(self, visit_name)
 
     def _no_visit_found(self, target, *args, **kwargs):
         """
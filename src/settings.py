@@ -119,7 +119,7 @@ set_valued_ops:
 
 analytics:
   If True, dataflow analysis will return a dict of information about
-  the contract, otherwise return an empty dict.
+  the contract, otherwise only whether the analysis bailed out.
   Disabling this might yield a slight speed improvement. False by default.
 
 extract_functions:
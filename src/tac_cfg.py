@@ -34,8 +34,6 @@ import copy
 import logging
 import typing as t
 
-import networkx as nx
-
 import src.blockparse as blockparse
 import src.cfg as cfg
 import src.evm_cfg as evm_cfg
@@ -77,7 +75,7 @@ class TACGraph(cfg.ControlFlowGraph):
         for b in self.blocks:
             b.cfg = self
 
-        self.root = next((b for b in self.blocks if b.entry == 0), None)
+        self.root = next(iter(self.get_blocks_by_entry(0)), None)
         """
         The root block of this CFG.
         The entry point will always be at index 0, if it exists.
@@ -141,21 +139,29 @@ class TACGraph(cfg.ControlFlowGraph):
             return terminals + [last_op]
         return terminals
 
-    def op_edge_list(self) -> t.Iterable[t.Tuple['TACOp', 'TACOp']]:
+    def op_edges(self) -> t.Generator[t.Tuple['TACOp', 'TACOp'], None, None]:
         """
+        Generator for the CFG's operation edges, which does not materialise
+        a list.
+
         Returns:
-          a list of the CFG's operation edges, with each edge in the form
+          a generator of the CFG's operation edges, with each edge in the form
           `(pred, succ)` where pred and succ are object references.
         """
-        edges = []
         for block in self.blocks:
-            intra_edges = list(zip(block.tac_ops[:-1], block.tac_ops[1:]))
-            edges += intra_edges
+            yield from zip(block.tac_ops, block.tac_ops[1:])
             for succ in block.succs:
-                edges.append((block.tac_ops[-1], succ.tac_ops[0]))
-        return edges
+                yield block.tac_ops[-1], succ.tac_ops[0]
+
+    def op_edge_list(self) -> t.List[t.Tuple['TACOp', 'TACOp']]:
+        """
+        Returns:
+          a list of the CFG's operation edges, with each edge in the form
+          `(pred, succ)` where pred and succ are object references.
+        """
+        return list(self.op_edges())
 
-    def nx_graph(self, op_edges=False) -> nx.DiGraph:
+    def nx_graph(self, op_edges=False) -> 'networkx.DiGraph':
         """
         Return a networkx representation of this CFG.
         Nodes are labelled by their corresponding block's identifier.
@@ -163,16 +169,20 @@ class TACGraph(cfg.ControlFlowGraph):
         Args:
           op_edges: if true, return edges between instructions rather than blocks.
         """
+        # networkx is slow to import and only needed here and for dominators,
+        # so don't make every user of this module pay for it up front.
+        import networkx as nx
+
         g = nx.DiGraph()
 
         if op_edges:
             g.add_nodes_from(hex(op.pc) for op in self.tac_ops)
-            g.add_edges_from((hex(p.pc), hex(s.pc)) for p, s in self.op_edge_list())
+            g.add_edges_from((hex(p.pc), hex(s.pc)) for p, s in self.op_edges())
             g.add_edges_from((hex(block.last_op.pc), UNRES_DEST)
                              for block in self.blocks if block.has_unresolved_jump)
         else:
             g.add_nodes_from(b.ident() for b in self.blocks)
-            g.add_edges_from((p.ident(), s.ident()) for p, s in self.edge_list())
+            g.add_edges_from((p.ident(), s.ident()) for p, s in self.edges())
             g.add_edges_from((block.ident(), UNRES_DEST) for block in self.blocks
                              if block.has_unresolved_jump)
         return g
@@ -209,6 +219,7 @@ class TACGraph(cfg.ControlFlowGraph):
             nx_graph.add_node(POSTDOM_END_NODE)
             nx_graph.add_edges_from(terminal_edges)
 
+        import networkx as nx
         doms = nx.algorithms.dominance.immediate_dominators(nx_graph, start)
         idents = [b.ident() for b in self.blocks]
 
@@ -314,7 +325,7 @@ class TACGraph(cfg.ControlFlowGraph):
         modified = False
 
         for pred_address in self.split_node_succs:
-            preds = self.get_blocks_by_pc(pred_address)
+            preds = self.get_blocks_by_entry(pred_address)
             s_lists = [node.succs for node in preds]
             succs = set(s for s_list in s_lists for s in s_list)
             for succ in self.split_node_succs[pred_address]:
@@ -360,7 +371,13 @@ class TACGraph(cfg.ControlFlowGraph):
         while modified:
             modified = False
 
-            for block in self.blocks:
+            # Splitting adds and removes blocks as the scan proceeds, so walk
+            # the current block list by position rather than iterating over
+            # a snapshot of it.
+            i = 0
+            while i < len(self.blocks):
+                block = self.blocks[i]
+                i += 1
 
                 if not self.__split_block_is_splittable(block, skip):
                     continue
@@ -441,15 +458,19 @@ class TACGraph(cfg.ControlFlowGraph):
         for b in path:
             # Save the edges of each block in case they can't be re-inferred.
             # They will be added back in at a later stage.
+            # Edges to blocks earlier in the path are left out, as those
+            # blocks are removed before this one.
+            succs = [s for s in sorted(b.succs) if s not in skip]
             if b.entry not in self.split_node_succs:
-                self.split_node_succs[b.entry] = [s for s in sorted(b.succs)]
+                self.split_node_succs[b.entry] = succs
             else:
                 new_list = self.split_node_succs[b.entry]
-                new_list += [s for s in sorted(b.succs) if s not in new_list]
+                new_list += [s for s in succs if s not in new_list]
                 self.split_node_succs[b.entry] = new_list
 
             skip.add(b)
-            self.remove_block(b)
+
+        self.remove_blocks(path)
 
         return skip
 
@@ -533,16 +554,22 @@ class TACGraph(cfg.ControlFlowGraph):
             # A list of lists of blocks to be merged.
             groups = []
 
+            # The groups keyed by entry address; only blocks at the same
+            # address can be equal, so other groups need not be checked.
+            entry_groups = {}
+
             # Group equivalent blocks together into lists.
             for block in self.blocks:
                 grouped = False
-                for group in groups:
+                candidates = entry_groups.setdefault(block.entry, [])
+                for group in candidates:
                     if blocks_equal(block, group[0]):
                         grouped = True
                         group.append(block)
                         break
                 if not grouped:
-                    groups.append([block])
+                    candidates.append([block])
+                    groups.append(candidates[-1])
 
             # Ignore blocks that are in groups by themselves.
             groups = [g for g in groups if len(g) > 1]
@@ -597,15 +624,14 @@ class TACGraph(cfg.ControlFlowGraph):
                     self.add_edge(new_block, succ)
                     for b in group:
                         self.remove_edge(b, succ)
-                for b in group:
-                    self.remove_block(b)
+                self.remove_blocks(group)
 
                 # If this block no longer has any duplicates in the graph,
                 # then everything it was split from has been merged.
                 # It no longer needs an ident suffix to disambiguate it and its entry in
                 # he split successors mapping can be removed, along with the edges
                 # inferred from that mapping connected up.
-                if len(self.get_blocks_by_pc(new_block.entry)) == 1:
+                if len(self.get_blocks_by_entry(new_block.entry)) == 1:
                     new_block.ident_suffix = ""
 
                     for a in self.split_node_succs:
@@ -615,8 +641,7 @@ class TACGraph(cfg.ControlFlowGraph):
 
                     if new_block.entry in self.split_node_succs:
                         for succ in self.split_node_succs[new_block.entry]:
-                            if succ not in new_block.succs:
-                                new_block.succs.append(succ)
+                            self.add_edge(new_block, succ)
                         del self.split_node_succs[new_block.entry]
 
             # Recondition the graph, having merged everything.
@@ -685,7 +710,7 @@ class TACGraph(cfg.ControlFlowGraph):
         Returns:
             An iterable of the groups of blocks which were merged.
         """
-        reached = self.transitive_closure(origin_addresses)
+        reached = set(self.transitive_closure(origin_addresses))
 
         # Sort the unreached ones for more-efficient merging.
         unreached = sorted([b for b in self.blocks if b not in reached], key=lambda b: b.entry)
@@ -810,6 +835,9 @@ class TACBasicBlock(evm_cfg.EVMBasicBlock):
     applied to the stack as a consequence of its execution.
     """
 
+    __slots__ = ("tac_ops", "delta_stack", "entry_stack", "exit_stack",
+                 "symbolic_overflow", "cfg")
+
     def __init__(self, entry_pc: int, exit_pc: int,
                  tac_ops: t.List['TACOp'],
                  evm_ops: t.List[evm_cfg.EVMOp],
@@ -985,40 +1013,54 @@ class TACBasicBlock(evm_cfg.EVMBasicBlock):
         # Construct the new exit stack from the entry and delta stacks.
         exit_stack = self.entry_stack.copy()
 
-        # Build a mapping from MetaVariables to the Variables they correspond to.
+        # Resolve the delta stack's MetaVariables to the Variables they
+        # correspond to, in the order they are to be pushed.
+        # Here we know the stack is full enough, given we've already checked it,
+        # but we'll get a MetaVariable if we try grabbing something off the end.
         metavar_map = {}
-        for var in self.delta_stack:
+        pushed = []
+        for var in self.delta_stack.value:
             if isinstance(var, mem.MetaVariable):
-                # Here we know the stack is full enough, given we've already checked it,
-                # but we'll get a MetaVariable if we try grabbing something off the end.
-                metavar_map[var] = exit_stack.peek(var.payload)
-
-        # Construct the exit stack itself.
-        exit_stack.pop_many(self.delta_stack.empty_pops)
-        for var in list(self.delta_stack)[::-1]:
-            if isinstance(var, mem.MetaVariable):
-                exit_stack.push(metavar_map[var])
-            else:
-                exit_stack.push(var)
+                if var not in metavar_map:
+                    metavar_map[var] = exit_stack.peek(var.payload)
+                var = metavar_map[var]
+            pushed.append(var)
+
+        # Construct the exit stack itself, popping and pushing in bulk.
+        # As with push(), anything beyond the stack's capacity is discarded.
+        values = exit_stack.value
+        pops = self.delta_stack.empty_pops
+        if pops > len(values):
+            exit_stack.empty_pops += pops - len(values)
+        del values[max(len(values) - pops, 0):]
+        values.extend(pushed[:max(exit_stack.max_size - len(values), 0)])
 
         self.exit_stack = exit_stack
 
         return overflow
 
-    def hook_up_stack_vars(self) -> None:
+    def hook_up_stack_vars(self) -> bool:
         """
         Replace all stack MetaVariables will be replaced with the actual
         variables they refer to.
+
+        Returns:
+            True iff the value of any argument was changed as a result.
         """
+        changed = False
         for op in self.tac_ops:
-            for i in range(len(op.args)):
-                if isinstance(op.args[i], TACArg):
-                    stack_var = op.args[i].stack_var
+            for arg in op.args:
+                if isinstance(arg, TACArg):
+                    stack_var = arg.stack_var
                     if stack_var is not None:
                         # If the required argument is past the end, don't replace the metavariable
                         # as we would thereby lose information.
                         if stack_var.payload < len(self.entry_stack):
-                            op.args[i].var = self.entry_stack.peek(stack_var.payload)
+                            var = self.entry_stack.peek(stack_var.payload)
+                            if not changed and arg.value != var:
+                                changed = True
+                            arg.var = var
+        return changed
 
     def hook_up_def_site_jumps(self) -> None:
         """
@@ -1199,6 +1241,13 @@ class TACOp(patterns.Visitable):
     of the EVM instruction it was derived from.
     """
 
+    _STORE_FORMATS = {opcodes.MSTORE: "M[{}]",
+                      opcodes.MSTORE8: "M8[{}]",
+                      opcodes.SSTORE: "S[{}]"}
+    """Formats of the left-hand side of store operations, by opcode."""
+
+    __slots__ = ("opcode", "args", "pc", "block")
+
     def __init__(self, opcode: opcodes.OpCode, args: t.List['TACArg'],
                  pc: int, block=None):
         """
@@ -1215,14 +1264,9 @@ class TACOp(patterns.Visitable):
         self.block = block
 
     def __str__(self):
-        if self.opcode in [opcodes.MSTORE, opcodes.MSTORE8, opcodes.SSTORE]:
-            if self.opcode == opcodes.MSTORE:
-                lhs = "M[{}]".format(self.args[0])
-            elif self.opcode == opcodes.MSTORE8:
-                lhs = "M8[{}]".format(self.args[0])
-            else:
-                lhs = "S[{}]".format(self.args[0])
-
+        lhs_format = self._STORE_FORMATS.get(self.opcode)
+        if lhs_format is not None:
+            lhs = lhs_format.format(self.args[0])
             return "{}: {} = {}".format(hex(self.pc), lhs,
                                         " ".join([str(arg) for arg in self.args[1:]]))
         return "{}: {} {}".format(hex(self.pc), self.opcode,
@@ -1270,6 +1314,12 @@ class TACAssignOp(TACOp):
     this operation's result is implicitly bound.
     """
 
+    _LOAD_FORMATS = {opcodes.SLOAD: "S[{}]",
+                     opcodes.MLOAD: "M[{}]"}
+    """Formats of the right-hand side of load operations, by opcode."""
+
+    __slots__ = ("lhs", "print_name")
+
     def __init__(self, lhs: mem.Variable, opcode: opcodes.OpCode,
                  args: t.List['TACArg'], pc: int, block=None,
                  print_name: bool = True):
@@ -1288,12 +1338,9 @@ class TACAssignOp(TACOp):
         self.print_name = print_name
 
     def __str__(self):
-        if self.opcode in [opcodes.SLOAD, opcodes.MLOAD]:
-            if self.opcode == opcodes.SLOAD:
-                rhs = "S[{}]".format(self.args[0])
-            else:
-                rhs = "M[{}]".format(self.args[0])
-
+        rhs_format = self._LOAD_FORMATS.get(self.opcode)
+        if rhs_format is not None:
+            rhs = rhs_format.format(self.args[0])
             return "{}: {} = {}".format(hex(self.pc), self.lhs.identifier, rhs)
         arglist = ([str(self.opcode)] if self.print_name else []) \
                   + [str(arg) for arg in self.args]
@@ -1323,6 +1370,8 @@ class TACArg:
     of a TACBasicBlock.
     """
 
+    __slots__ = ("var", "stack_var")
+
     def __init__(self, var: mem.Variable = None, stack_var: mem.MetaVariable = None):
         self.var = var
         """The actual variable this arg contains."""
@@ -1356,6 +1405,8 @@ class TACArg:
 class TACLocRef:
     """Contains a reference to a program counter within a particular block."""
 
+    __slots__ = ("block", "pc")
+
     def __init__(self, block, pc):
         self.block = block
         """The block that contains the referenced instruction."""
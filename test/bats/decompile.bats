@@ -39,3 +39,86 @@ MP="bin/decompile"
     rm $GRAPH_OUTFILE
     rm -rf $TSV_OUTDIR
 }
+
+# Output cache tests. The analysis time limit is lifted so that output is
+# never withheld from the cache because a run bailed out.
+CACHE_CFG="bailout_seconds=-1"
+
+@test "$M caches string output under \$VANDAL_CFG_CACHE" {
+    export VANDAL_CFG_CACHE=$(mktemp -d)
+    CACHE_DIR=$VANDAL_CFG_CACHE
+    OUT_DIR=$(mktemp -d)
+
+    run $MP -c "$CACHE_CFG" $HEX_INPUT/basic.hex $OUT_DIR/first
+    [ "$status" -eq 0 ]
+    [ $(find $CACHE_DIR -name "*.cfg" | wc -l) -eq 1 ]
+
+    # A repeat run is served from the cache, with identical output.
+    run $MP -c "$CACHE_CFG" $HEX_INPUT/basic.hex $OUT_DIR/second
+    [ "$status" -eq 0 ]
+    cmp $OUT_DIR/first $OUT_DIR/second
+    [ $(find $CACHE_DIR -name "*.cfg" | wc -l) -eq 1 ]
+    [ $(find $CACHE_DIR -name "*.tmp" | wc -l) -eq 0 ]
+
+    rm -rf $CACHE_DIR $OUT_DIR
+}
+
+@test "$M keys cached output by settings" {
+    export VANDAL_CFG_CACHE=$(mktemp -d)
+    CACHE_DIR=$VANDAL_CFG_CACHE
+    OUT_DIR=$(mktemp -d)
+
+    run $MP -c "$CACHE_CFG" $HEX_INPUT/basic.hex $OUT_DIR/first
+    [ "$status" -eq 0 ]
+    run $MP -c "$CACHE_CFG, widen_threshold=5" $HEX_INPUT/basic.hex $OUT_DIR/second
+    [ "$status" -eq 0 ]
+    [ $(find $CACHE_DIR -name "*.cfg" | wc -l) -eq 2 ]
+    [ $(find $CACHE_DIR -name "*.tmp" | wc -l) -eq 0 ]
+
+    rm -rf $CACHE_DIR $OUT_DIR
+}
+
+@test "$M leaves the output cache untouched for graph and TSV output" {
+    export VANDAL_CFG_CACHE=$(mktemp -d)
+    CACHE_DIR=$VANDAL_CFG_CACHE
+    OUT_DIR=$(mktemp -d)
+
+    run $MP -c "$CACHE_CFG" -g $OUT_DIR/cfg.dot $HEX_INPUT/basic.hex $OUT_DIR/out
+    [ "$status" -eq 0 ]
+    run $MP -c "$CACHE_CFG" -t $OUT_DIR/tsv $HEX_INPUT/basic.hex $OUT_DIR/out
+    [ "$status" -eq 0 ]
+    [ $(find $CACHE_DIR -type f | wc -l) -eq 0 ]
+
+    # An existing entry is neither read nor refreshed by such runs.
+    run $MP -c "$CACHE_CFG" $HEX_INPUT/basic.hex $OUT_DIR/out
+    [ "$status" -eq 0 ]
+    touch -d "2000-01-01" $CACHE_DIR/*.cfg
+    run $MP -c "$CACHE_CFG" -g $OUT_DIR/cfg.dot -t $OUT_DIR/tsv $HEX_INPUT/basic.hex $OUT_DIR/out
+    [ "$status" -eq 0 ]
+    [ $(find $CACHE_DIR -type f | wc -l) -eq 1 ]
+    [ $(find $CACHE_DIR -newermt "2001-01-01" -type f | wc -l) -eq 0 ]
+
+    rm -rf $CACHE_DIR $OUT_DIR
+}
+
+@test "$M removes temporary files when an output cache write fails" {
+    export VANDAL_CFG_CACHE=$(mktemp -d)
+    CACHE_DIR=$VANDAL_CFG_CACHE
+    OUT_DIR=$(mktemp -d)
+
+    run $MP -c "$CACHE_CFG" $HEX_INPUT/basic.hex $OUT_DIR/first
+    [ "$status" -eq 0 ]
+
+    # Put a directory in place of the entry, so it can't be read or replaced.
+    ENTRY=$(find $CACHE_DIR -name "*.cfg")
+    rm $ENTRY
+    mkdir $ENTRY
+
+    run $MP -c "$CACHE_CFG" $HEX_INPUT/basic.hex $OUT_DIR/second
+    [ "$status" -eq 0 ]
+    cmp $OUT_DIR/first $OUT_DIR/second
+    [ -d $ENTRY ]
+    [ $(find $CACHE_DIR -name "*.tmp" | wc -l) -eq 0 ]
+
+    rm -rf $CACHE_DIR $OUT_DIR
+}
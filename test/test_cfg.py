@@ -155,11 +155,14 @@ class TestBasicBlock:
         else:
             assert b.ident().startswith("0x"), \
                 "ident() must return hex string with '0x' prefix"
+            b.ident_suffix = "_1"
+            assert b.ident() == hex(b.entry) + "_1", \
+                "ident() must reflect a changed ident_suffix"
 
 
 class TestControlFlowGraph:
     def test_construction(self, graph):
-        assert graph.blocks == []
+        assert graph.blocks == ()
         assert graph.root is None
 
     def test_accept(self, graph):
@@ -188,7 +191,8 @@ class TestControlFlowGraph:
         assert len(graph.edge_list()) == 0, "graph must start empty"
 
         # Add blocks to graph and build edge connections
-        graph.blocks.extend(blocks.values())
+        for b in blocks.values():
+            graph.add_block(b)
         for e_en, e_ex in edges:
             pred = blocks[e_en]
             succ = blocks[e_ex]
@@ -207,6 +211,9 @@ class TestControlFlowGraph:
 
         assert len(graph.edge_list()) == len(edges), \
             "unexpected number of edges in the graph"
+        assert graph.edge_count() == len(edges)
+        assert list(graph.edges()) == graph.edge_list(), \
+            "edges() must generate the same edges as edge_list()"
 
     def test_str(self, graph, blocks_edges):
         blocks = tuple(SubBlock(*b) for b in blocks_edges[0])
@@ -220,7 +227,7 @@ class TestControlFlowGraph:
             for b_prev in blocks[:i]:
                 assert str(b_prev) in str(graph)
             # add the block to the graph:
-            graph.blocks.append(b)
+            graph.add_block(b)
             # ensure its str() is in the graph's str()
             assert str(b) in str(graph)
 
@@ -228,8 +235,190 @@ class TestControlFlowGraph:
         # graph starts out empty
         assert len(graph) == len(graph.blocks) == 0
         # add a block
-        graph.blocks.append(SubBlock(1, 2))
+        graph.add_block(SubBlock(1, 2))
         assert len(graph) == len(graph.blocks) == 1
         # add another block
-        graph.blocks.append(SubBlock(3, 4))
+        graph.add_block(SubBlock(3, 4))
         assert len(graph) == len(graph.blocks) == 2
+
+    def test_get_blocks_by_entry(self, graph, blocks_edges):
+        blocks = [SubBlock(*b) for b in blocks_edges[0]]
+        for b in blocks:
+            graph.add_block(b)
+        for b in blocks:
+            assert b in graph.get_blocks_by_entry(b.entry)
+
+        # The index must follow blocks as they are removed.
+        for b in blocks:
+            graph.remove_block(b)
+            assert b not in graph.get_blocks_by_entry(b.entry)
+
+    def test_blocks_read_only(self, graph):
+        a, b = SubBlock(0, 3), SubBlock(4, 5)
+        graph.add_block(a)
+        assert graph.get_blocks_by_entry(4) == []
+
+        # The block list can't be changed behind the entry index's back.
+        with pytest.raises(AttributeError):
+            graph.blocks.append(b)
+        graph.add_block(b)
+        assert graph.get_blocks_by_entry(4) == [b]
+
+        # Replacing the block list rebuilds the index.
+        c = SubBlock(4, 7)
+        graph.blocks = [a, c]
+        assert graph.blocks == (a, c)
+        assert graph.get_blocks_by_entry(4) == [c]
+
+    def test_sorted_traversal(self, graph):
+        a, b, c = SubBlock(4, 5), SubBlock(0, 1), SubBlock(2, 3)
+        graph.add_block(a)
+        graph.add_block(b)
+        assert list(graph.sorted_traversal()) == [b, a]
+        assert list(graph.sorted_traversal(reverse=True)) == [a, b]
+
+        # Cached orderings must be discarded when blocks change.
+        graph.add_block(c)
+        assert list(graph.sorted_traversal()) == [b, c, a]
+        graph.remove_block(b)
+        assert list(graph.sorted_traversal()) == [c, a]
+        assert list(graph.sorted_traversal(key=lambda x: -x.entry)) == [a, c]
+
+    def test_get_block_by_ident(self, graph):
+        a, b = SubBlock(0, 1), SubBlock(2, 3)
+        graph.add_block(a)
+        graph.add_block(b)
+        assert graph.get_block_by_ident("0x2") is b
+        assert graph.get_block_by_ident("0x4") is None
+
+        # Lookups must follow changes to block identifiers.
+        b.ident_suffix = "_1"
+        assert graph.get_block_by_ident("0x2") is None
+        assert graph.get_block_by_ident("0x2_1") is b
+        graph.remove_block(a)
+        assert graph.get_block_by_ident("0x0") is None
+
+    def test_get_blocks_by_pc(self, graph):
+        a, b, c, d = SubBlock(4, 9), SubBlock(0, 3), SubBlock(0, 10), SubBlock(5, 6)
+        for block in (a, b, c, d):
+            graph.add_block(block)
+        assert graph.get_blocks_by_pc(2) == [b, c]
+        assert graph.get_blocks_by_pc(5) == [a, c, d]
+        assert graph.get_blocks_by_pc(10) == [c]
+        assert graph.get_blocks_by_pc(11) == []
+
+        # The index must follow blocks as they are added and removed.
+        graph.remove_block(c)
+        assert graph.get_blocks_by_pc(10) == []
+        e = SubBlock(10, 12)
+        graph.add_block(e)
+        assert graph.get_blocks_by_pc(10) == [e]
+
+        # Direct changes to the block list, which would leave the index
+        # stale, are rejected; replacing the list rebuilds the index.
+        f = SubBlock(3, 4)
+        with pytest.raises(AttributeError):
+            graph.blocks.append(f)
+        assert graph.get_blocks_by_pc(4) == [a]
+        graph.blocks = list(graph.blocks) + [f]
+        assert graph.get_blocks_by_pc(4) == [a, f]
+
+    def test_adjacency(self, graph):
+        a, b, c = SubBlock(0, 1), SubBlock(2, 3), SubBlock(4, 5)
+        for block in (a, b, c):
+            graph.add_block(block)
+        graph.add_edge(a, c)
+        graph.add_edge(a, b)
+        index, preds, succs = graph.adjacency()
+        assert index == {a: 0, b: 1, c: 2}
+        assert preds == [(), (0,), (0,)]
+        assert succs == [(2, 1), (), ()]
+
+        # The numbering must be rebuilt when the graph changes.
+        graph.remove_block(a)
+        index, preds, succs = graph.adjacency()
+        assert index == {b: 0, c: 1}
+        assert preds == succs == [(), ()]
+
+    def test_reachable_from(self, graph):
+        a, b, c = SubBlock(0, 1), SubBlock(2, 3), SubBlock(4, 5)
+        for block in (a, b, c):
+            graph.add_block(block)
+        graph.add_edge(a, b)
+        assert graph.reachable_from(a) == {b}
+        assert graph.reaches(a, [b]) and not graph.reaches(a, [c])
+
+        # Cached results must be discarded when edges change.
+        graph.add_edge(b, c)
+        assert graph.reachable_from(a) == {b, c}
+        graph.remove_edge(a, b)
+        assert graph.reachable_from(a) == set()
+        assert not graph.reaches(a, [c])
+
+    def test_blocks_reaching(self, graph):
+        a, b, c, d = SubBlock(0, 1), SubBlock(2, 3), SubBlock(4, 5), SubBlock(6, 7)
+        for block in (a, b, c, d):
+            graph.add_block(block)
+        graph.add_edge(a, b)
+        graph.add_edge(b, c)
+        graph.add_edge(c, b)
+        assert graph.blocks_reaching([c]) == {a, b, c}
+        assert graph.blocks_reaching([a, d]) == {a, d}
+        assert graph.blocks_reaching([]) == set()
+        for dests in ([b], [a], [c, d]):
+            reaching = graph.blocks_reaching(dests)
+            assert all((x in reaching) == graph.reaches(x, dests)
+                       for x in (a, b, c, d))
+
+        # Successor edges are followed even without matching predecessors.
+        e = SubBlock(8, 9)
+        graph.add_block(e)
+        e.succs.append(a)
+        assert graph.reaches(e, [c])
+        assert graph.blocks_reaching([c]) == {a, b, c, e}
+
+    def test_transitive_closure(self, graph):
+        a, b, c, d = SubBlock(0, 1), SubBlock(2, 3), SubBlock(4, 5), SubBlock(6, 7)
+        for block in (a, b, c, d):
+            graph.add_block(block)
+        graph.add_edge(a, b)
+        graph.add_edge(a, c)
+        graph.add_edge(b, c)
+        graph.add_edge(c, a)
+        assert graph.transitive_closure([0]) == [a, b, c]
+        assert set(graph.transitive_closure([2, 7])) == {a, b, c, d}
+
+        # Cached closures must be discarded when edges change.
+        graph.add_edge(c, d)
+        assert graph.transitive_closure([0]) == [a, b, c, d]
+        graph.remove_edge(c, d)
+
+        assert graph.remove_unreachable_blocks([4]) == [d]
+        assert graph.blocks == (a, b, c)
+
+    def test_remove_blocks(self, graph):
+        a, b, c, d = SubBlock(0, 1), SubBlock(2, 3), SubBlock(4, 5), SubBlock(6, 7)
+        for block in (a, b, c, d):
+            graph.add_block(block)
+        graph.root = b
+        for head, tail in [(a, b), (a, c), (a, d), (b, c), (c, d), (d, a)]:
+            graph.add_edge(head, tail)
+
+        graph.remove_blocks([b, c])
+        assert graph.blocks == (a, d)
+        assert graph.root is None
+        assert a.succs == [d] and a.preds == [d]
+        assert d.succs == [a] and d.preds == [a]
+        assert b.preds == b.succs == c.preds == c.succs == []
+        assert graph.get_blocks_by_pc(2) == []
+
+    def test_recalc_preds(self, graph):
+        a, b = SubBlock(0, 1), SubBlock(2, 3)
+        graph.add_block(a)
+        graph.add_block(b)
+        # Only the successor lists are set up, as recalc_preds() rebuilds
+        # the predecessor lists from them.
+        a.succs.extend([b, b])
+        graph.recalc_preds()
+        assert b.preds == [a], "recalc_preds() must not duplicate predecessors"
+        assert a.preds == []
@@ -0,0 +1,72 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2016, 2017, The University of Sydney. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import pytest
+
+import src.dataflow as dataflow
+import src.lattice as lattice
+import src.settings as settings
+import src.tac_cfg as tac_cfg
+
+
+# Format: bytecode, {block entry: (entry stack size, exit stack size)}
+@pytest.fixture(params=[
+    # PUSH1 1; PUSH1 2; ADD; STOP
+    ("600160020100", {0x0: (0, 1)}),
+    # PUSH1 1; PUSH1 5; JUMP; JUMPDEST; STOP
+    ("60016005565b00", {0x0: (0, 1), 0x5: (1, 1)}),
+    # PUSH1 1; PUSH1 7; JUMPI; PUSH1 0; JUMPDEST; STOP
+    ("600160075760005b00", {0x0: (0, 0), 0x5: (0, 1), 0x7: (None, None)}),
+])
+def sized_graph(request):
+    settings.import_config()
+    return tac_cfg.TACGraph.from_bytecode(request.param[0]), request.param[1]
+
+
+class TestStackSizeAnalysis:
+    def test_stack_sizes(self, sized_graph):
+        cfg, expected = sized_graph
+        entry_info, exit_info = dataflow.stack_size_analysis(cfg)
+        assert set(entry_info) == set(exit_info) == set(cfg.blocks)
+
+        for block in cfg.blocks:
+            en, ex = expected[block.entry]
+            for size, info in ((en, entry_info), (ex, exit_info)):
+                if size is None:
+                    assert info[block].is_bottom
+                else:
+                    assert info[block] == lattice.IntLatticeElement(size)
+
+    def test_graph_unchanged(self, sized_graph):
+        cfg, _ = sized_graph
+        preds = {block: list(block.preds) for block in cfg.blocks}
+        dataflow.stack_size_analysis(cfg)
+        for block in cfg.blocks:
+            assert block.preds == preds[block], \
+                "stack_size_analysis() must leave predecessor lists intact"
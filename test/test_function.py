@@ -52,8 +52,8 @@ def funcs(request):
     Returns: a FunExtract object extracted from a file
     """
     settings.import_config()
-    f = open(dir_path + request.param[0], 'r')
-    cfg = tac_cfg.TACGraph.from_bytecode(f.read())
+    with open(dir_path + request.param[0], 'r') as f:
+        cfg = tac_cfg.TACGraph.from_bytecode(f.read())
     dataflow.analyse_graph(cfg)
     fun_extractor = function.FunctionExtractor(cfg)
     fun_extractor.extract()
@@ -34,6 +34,7 @@
 ## IMPORTS
 
 import argparse
+import hashlib
 import itertools
 import json
 import logging
@@ -44,6 +45,7 @@ import sys
 import signal
 import time
 import sys
+import typing as t
 from multiprocessing import Process, SimpleQueue, Manager, Event
 from os.path import abspath, dirname, join
 
@@ -297,6 +299,22 @@ def empty_working_dir(index) -> None:
             os.remove(join(d_triple[0], fname))
 
 
+def contract_digest(filename: str) -> t.Optional[bytes]:
+    """
+    Return a digest of the bytecode held in the given contract file, so that
+    contracts with identical bytecode need only be analysed once.
+    None is returned if the file could not be read.
+
+    Args:
+        filename: the location of the contract bytecode file to hash
+    """
+    try:
+        with open(join(args.contract_dir, filename), 'rb') as file:
+            return hashlib.sha256(file.read().strip()).digest()
+    except OSError:
+        return None
+
+
 def analyse_contract(job_index: int, index: int, filename: str, result_queue, timeout: int) -> None:
     """
     Perform dataflow analysis on a contract, storing the result in the queue.
@@ -457,6 +475,12 @@ avail_jobs = list(range(args.jobs))
 contract_iter = enumerate(to_process)
 contracts_exhausted = False
 
+# Map from bytecode digests to the first contract seen with that bytecode.
+# Later contracts with the same digest are not reanalysed; they are recorded
+# here as (filename, original filename) pairs and take the original's result.
+analysed_digests = {}
+duplicates = []
+
 # Track the souffle process started by the current fork so we can kill it in
 # the signal handler.
 souffle_proc = None
@@ -481,6 +505,12 @@ try:
         while not contracts_exhausted and len(avail_jobs) > 0:
             try:
                 index, fname = next(contract_iter)
+                digest = contract_digest(fname)
+                if digest is not None:
+                    if digest in analysed_digests:
+                        duplicates.append((fname, analysed_digests[digest]))
+                        continue
+                    analysed_digests[digest] = fname
                 job_index = avail_jobs.pop()
                 proc = Process(
                         target=analyse_contract,
@@ -520,6 +550,15 @@ try:
     run_signal.clear()
     flush_proc.join(FLUSH_PERIOD + 1)
 
+    # Duplicate contracts share the result of their first occurrence.
+    if duplicates:
+        log("Reusing results for {} duplicate contracts.".format(len(duplicates)))
+        results_by_name = {r[0]: r for r in res_list}
+        for fname, orig_name in duplicates:
+            if orig_name in results_by_name:
+                _, vulns, meta, analytics = results_by_name[orig_name]
+                res_list.append((fname, vulns, meta, dict(analytics)))
+
     counts = {}
     total_flagged = 0
     for contract, vulns, meta, analytics in res_list:
@@ -22,83 +22,93 @@ def ensure_0x(string):
         return string
     return "0x" + string
 
-interfaces = {}
-
-# Import eth-utils only if required.
-import_eth_utils = False
-for interface_file in listdir(INTERFACES_DIR):
-    if interface_file.startswith('.'):
-        continue
-    with open(join(INTERFACES_DIR, interface_file), 'r') as f:
-        for line in f:
-            func_name = line.strip()
-            if func_re.fullmatch(func_name) is not None or \
-               func_re.fullmatch(func_name) is not None:
-                   import_eth_utils = True
-                   break
-    if import_eth_utils:
-        break
-if import_eth_utils:
-    from eth_utils import function_signature_to_4byte_selector as encode_sig
-    from eth_utils import function_abi_to_4byte_selector as encode_abi
-
-# Read Solidity function interfaces.
-print("Reading interfaces...")
-for interface_file in listdir(INTERFACES_DIR):
-    if interface_file.startswith('.'):
-        continue
-    print("  - {}".format(interface_file))
-    with open(join(INTERFACES_DIR, interface_file), 'r') as f:
-        interface = {}
-        # Handle a json contract ABI.
-        if interface_file.endswith(".json"):
-            abi = json.load(f)
-            for func in [func for func in abi if func['type'] == 'function']:
-                interface[func['name']] = ensure_0x(encode_abi(func).hex())
-        # Otherwise just take a file with signatures listed line by line.
-        else:
+def read_interfaces():
+    """Read the Solidity function interfaces in INTERFACES_DIR."""
+    interfaces = {}
+
+    import_eth_utils = False
+    for interface_file in listdir(INTERFACES_DIR):
+        if interface_file.startswith('.'):
+            continue
+        with open(join(INTERFACES_DIR, interface_file), 'r') as f:
             for line in f:
                 func_name = line.strip()
-                func_match = func_re.fullmatch(func_name)
-                sig_match = sig_re.fullmatch(func_name)
-                
-                # Handle either the unencoded string or the four-byte selector
-                if func_match is not None:
-                    interface[func_name] = ensure_0x(encode_sig(func_name).hex())
-                elif sig_match is not None:
-                    interface[func_name] = ensure_0x(func_name)
-        interfaces[interface_file] = interface
-print()
-
-# Perform a minimal decompile and extract functions.
-settings.import_config()
-settings.extract_functions = True
-settings.mark_functions = False
-settings.max_iterations = 0
-settings.analytics = False
-settings.merge_unreachable = False
-settings.remove_unreachable = False
-
-for contract_file in listdir(CONTRACTS_DIR):
-    with open(join(CONTRACTS_DIR, contract_file), 'r') as f:
-        print("{}".format(contract_file), end="")
-        cfg = tac_cfg.TACGraph.from_bytecode(f)
-        dataflow.analyse_graph(cfg)
-        sigs = [func.signature for func in cfg.function_extractor.public_functions]
-
-        # Pad any short signatures with leading zeroes until eight nibbles long.
-        for i in range(len(sigs)):
-            sig = sigs[i]
-            if len(sig) < 10:
-                sigs[i] = ensure_0x("0"*(10 - len(sig)) + sig[2:])
-
-        conforming = []
-        for interface, interface_sigs in interfaces.items():
-            if all(sig in sigs for sig in interface_sigs.values()):
-                conforming.append(interface)
-        
-        if conforming:
-            print(" conforms to {}.".format(", ".join(conforming)))
-        else:
-            print(": no matching interface provided.")
+                if func_re.fullmatch(func_name) is not None or \
+                   func_re.fullmatch(func_name) is not None:
+                       import_eth_utils = True
+                       break
+        if import_eth_utils:
+            break
+    if import_eth_utils:
+        from eth_utils import function_signature_to_4byte_selector as encode_sig
+        from eth_utils import function_abi_to_4byte_selector as encode_abi
+
+    print("Reading interfaces...")
+    for interface_file in listdir(INTERFACES_DIR):
+        if interface_file.startswith('.'):
+            continue
+        print("  - {}".format(interface_file))
+        with open(join(INTERFACES_DIR, interface_file), 'r') as f:
+            interface = {}
+            # Handle a json contract ABI.
+            if interface_file.endswith(".json"):
+                abi = json.load(f)
+                for func in [func for func in abi if func['type'] == 'function']:
+                    interface[func['name']] = ensure_0x(encode_abi(func).hex())
+            # Otherwise just take a file with signatures listed line by line.
+            else:
+                for line in f:
+                    func_name = line.strip()
+                    func_match = func_re.fullmatch(func_name)
+                    sig_match = sig_re.fullmatch(func_name)
+                    
+                    # Handle either the unencoded string or the four-byte selector
+                    if func_match is not None:
+                        interface[func_name] = ensure_0x(encode_sig(func_name).hex())
+                    elif sig_match is not None:
+                        interface[func_name] = ensure_0x(func_name)
+            interfaces[interface_file] = interface
+    print()
+
+    return interfaces
+
+
+def check_contracts(interfaces):
+    """
+    Perform a minimal decompile of each contract in CONTRACTS_DIR, extract its
+    functions, and report which of the given interfaces it conforms to.
+    """
+    settings.import_config()
+    settings.extract_functions = True
+    settings.mark_functions = False
+    settings.max_iterations = 0
+    settings.analytics = False
+    settings.merge_unreachable = False
+    settings.remove_unreachable = False
+
+    for contract_file in listdir(CONTRACTS_DIR):
+        with open(join(CONTRACTS_DIR, contract_file), 'r') as f:
+            print("{}".format(contract_file), end="")
+            cfg = tac_cfg.TACGraph.from_bytecode(f)
+            dataflow.analyse_graph(cfg)
+            sigs = [func.signature for func in cfg.function_extractor.public_functions]
+
+            # Pad any short signatures with leading zeroes until eight nibbles long.
+            for i in range(len(sigs)):
+                sig = sigs[i]
+                if len(sig) < 10:
+                    sigs[i] = ensure_0x("0"*(10 - len(sig)) + sig[2:])
+
+            conforming = []
+            for interface, interface_sigs in interfaces.items():
+                if all(sig in sigs for sig in interface_sigs.values()):
+                    conforming.append(interface)
+            
+            if conforming:
+                print(" conforms to {}.".format(", ".join(conforming)))
+            else:
+                print(": no matching interface provided.")
+
 
+if __name__ == "__main__":
+    check_contracts(read_interfaces())